@@ -2,9 +2,10 @@ import os
 import logging
 from os import path
 import argparse
-from langchain.output_parsers import PydanticOutputParser
+from llms import get_llm_registry
 from prompts import get_test_build_prompt, get_code_builder_prompt, get_test_builder_system_prompt
 from agents.agent import PyExecutorAgent, GraphState
+from artifacts import DiskArtifactStore
 from models.codestate import CodeState
 from typing import Optional
 from dotenv import load_dotenv
@@ -34,16 +35,18 @@ logging.basicConfig(
 log = logging.getLogger("Service")
 load_dotenv()
 
-def run_code_builder(spec_file: str, language: str):
+def run_code_builder(spec_file: str, language: str, compact_state: bool = False):
     with open(spec_file) as f:
         # Prompt the test builder to build tests providing
         spec = f.read()
-        parser = PydanticOutputParser(pydantic_object=CodeState)
-        output_formatting = parser.get_format_instructions()
+        output_formatting = get_llm_registry().get_format_instructions(CodeState)
         test_builder_prompt = get_test_build_prompt(spec, language, output_formatting)
 
         log.debug(f"Prompting test builder with user prompt: {test_builder_prompt}")
-        agent = PyExecutorAgent(os.getenv('MODEL'), os.getenv('PROVIDER'), output_formatting)
+        artifact_store = DiskArtifactStore()
+        run_id = artifact_store.start_run(spec, language, os.getenv('MODEL'))
+        agent = PyExecutorAgent(os.getenv('MODEL'), os.getenv('PROVIDER'), output_formatting,
+                                artifact_store=artifact_store, run_id=run_id, compact_state=compact_state)
 
         graph = StateGraph(GraphState)
         graph.add_node("generate", agent.generate)
@@ -70,21 +73,38 @@ def run_code_builder(spec_file: str, language: str):
 
         results = None
 
-        while not results or not results['success'] or not results['generation']:
-            results = app.invoke({"messages": [
-            ("system", get_test_builder_system_prompt()),
-            ("user", test_builder_prompt)],
-                    "iterations": 0,
-                    "error": "",
-                    "generation": None,
-                    "success": False,
-                    "code_review": None,
-                    "spec": spec},
-                    config={"recursion_limit": 100})
+        outcome = "error"
+        try:
+            while not results or not results['success'] or not results['generation']:
+                initial_state = {"messages": [
+                ("system", get_test_builder_system_prompt()),
+                ("user", test_builder_prompt)],
+                        "iterations": 0,
+                        "error": "",
+                        "generation": None,
+                        "success": False,
+                        "code_review": None,
+                        "spec": spec}
+                if compact_state:
+                    initial_state = artifact_store.compact(initial_state)
+                results = app.invoke(initial_state, config={"recursion_limit": 100})
+            outcome = "passed"
+        except SystemExit:
+            # The agent exits when a node runs out of retries.
+            outcome = "failed"
+            raise
+        finally:
+            # Anything else escaping the graph (recursion limit, unexpected errors, interrupts)
+            # is recorded as an error so the run does not stay 'running' in the index.
+            artifact_store.finish_run(run_id, outcome)
         
         log.info(f"Code creation has completed. results: {results}")
+        if compact_state:
+            results = artifact_store.materialize(results, "generation")
         if results and results['generation']:
             result = results['generation']
+            artifact_store.record(run_id, "final_tests", 0, result.test_suite)
+            artifact_store.record(run_id, "final_code", 0, result.code_under_test)
             output_dir_name = f"build/tests-{str(time.time())}/"
             os.makedirs(output_dir_name)
 
@@ -132,14 +152,40 @@ if __name__ == '__main__':
         type=str,
         help='Specification to build application from.'
     )
+    group.add_argument(
+        '--gc',
+        action='store_true',
+        help='Apply the retention policy to the artifact store and exit without starting a run.'
+    )
     parser.add_argument(
         '--language',
         type=str,
         default='Python',
         help='The programming language to develop in. Defaults to the greatest programming language ever! All Hail!'
     )
+    parser.add_argument(
+        '--compact-state',
+        action='store_true',
+        help='Keep large payloads in a content-addressed artifact store and carry only references in the graph state.'
+    )
+    parser.add_argument(
+        '--retention-days',
+        type=float,
+        help='Remove runs older than this many days from the artifact store, along with their unreferenced artifacts. '
+             'Applied before the run, or on its own with --gc.'
+    )
+    parser.add_argument(
+        '--retention-runs',
+        type=int,
+        help='Keep only this many of the most recent runs in the artifact store.'
+    )
 
     args = parser.parse_args()
+
+    if args.gc or args.retention_days is not None or args.retention_runs is not None:
+        DiskArtifactStore().gc(max_age_days=args.retention_days, max_runs=args.retention_runs)
+        if args.gc:
+            exit(0)
     
     if args.create_workspace is not None:
         # run the workspace creation algorithm
@@ -156,4 +202,4 @@ if __name__ == '__main__':
 
 
         #begin the chaos
-        run_code_builder(args.specification, args.language) 
+        run_code_builder(args.specification, args.language, args.compact_state)
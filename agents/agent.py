@@ -3,23 +3,29 @@ from executors import PyDockerExecutor
 from models.codestate import CodeState
 from models.graphstate import GraphState
 from models.reviewstate import ReviewState
-from langchain.chat_models import init_chat_model
-from langchain.output_parsers import PydanticOutputParser
+from llms import get_llm_registry
+from artifacts import DiskArtifactStore
 from prompts import get_fix_prompt, get_review_prompt, get_fix_with_review_prompt
 import logging
 from pydantic_core import ValidationError
 from langgraph.graph import END
-from datetime import datetime
 
 class PyExecutorAgent:
-    def __init__(self, model, model_provider, output_formatting, try_tolerance=5):
+    def __init__(self, model, model_provider, output_formatting, try_tolerance=5,
+                 artifact_store: DiskArtifactStore = None, run_id: str = None, compact_state=False):
         self.log = logging.getLogger("PyExecutorAgent")
-        self.storage_dir = f"storage/{datetime.now().strftime('%Y%m%d_%H%M%S')}/"
-        self.py_executor = PyDockerExecutor(self.storage_dir)
+        self.artifact_store = artifact_store or DiskArtifactStore()
+        self.run_id = run_id or self.artifact_store.start_run(model=model)
+        self.py_executor = PyDockerExecutor(self.artifact_store, self.run_id)
         self.output_formatting = output_formatting
-        self.llm = init_chat_model(model, max_tokens=8192, temperature=0.6, model_provider=model_provider)
+        registry = get_llm_registry()
+        self.code_llm = registry.get_structured(model, model_provider, CodeState)
+        self.review_llm = registry.get_structured(model, model_provider, ReviewState)
+        self.review_formatting = registry.get_format_instructions(ReviewState)
         self.try_tolerance = try_tolerance
         self.review_count = 0
+        # When set, graph states are kept compact: large payloads live in the store as refs.
+        self.compact_state = compact_state
 
     def __del__(self):
         self.py_executor.stop_and_remove()
@@ -30,12 +36,20 @@ class PyExecutorAgent:
             self.log.debug(f"key: {key}, value: {value}")
         self.log.debug("###########################")
 
+    def _view(self, state: GraphState, *keys: str) -> GraphState:
+        """Materialize only the payloads a node needs when running with compact state."""
+        return self.artifact_store.materialize(state, *keys) if self.compact_state else state
+
+    def _pack(self, state: GraphState) -> GraphState:
+        return self.artifact_store.compact(state) if self.compact_state else state
+
     def execute_python_with_docker(self, state: GraphState) -> Dict[str, Any]:
         """Execute Python code in a Docker Container"""
         self.log.info("\n\n\n+++++++++++ executing execute_python_with_docker")
         try:
-            self.py_executor.build_application_structure(state)
-            exec_result = self.py_executor.run_script(state)
+            view = self._view(state, "generation")
+            self.py_executor.build_application_structure(view)
+            exec_result = self.py_executor.run_script(view)
         except Exception as e:
             self.log.error(f"Exception caught while executing python with docker: {e}")
             exec_result = {"error": str(e)}
@@ -47,12 +61,13 @@ class PyExecutorAgent:
         self.log.info("\n+++++++++++ executing generate")
         self.log_state(state)
         
+        view = self._view(state, "messages")
         generation = None
         tries = 0
         while not generation and tries < self.try_tolerance:
             try:
-                self.log.debug(f"Calling llm to generate tests and code with messages: {state["messages"]}.")
-                generation = self.llm.with_structured_output(CodeState).invoke(state['messages'])
+                self.log.debug(f"Calling llm to generate tests and code with messages: {view["messages"]}.")
+                generation = self.code_llm.invoke(view['messages'])
                 self.log.debug("generation of tests and code complete.")
             except Exception as e:
                 self.log.error(f"Exception caught in generate: {e}.\nRetrying...")
@@ -64,11 +79,11 @@ class PyExecutorAgent:
             self.py_executor.stop_and_remove()
             exit(1)
         
-        return {**state,
-                "messages": state["messages"][0:1],
-                "error": "",
-                "generation": generation,
-                "iterations": state["iterations"] + 1}
+        return self._pack({**state,
+                           "messages": state["messages"][0:1],
+                           "error": "",
+                           "generation": generation,
+                           "iterations": state["iterations"] + 1})
 
     def validate_generation(self, state: GraphState) -> str:
         self.log.info(f"\n+++++++++++++++ executing validate_generation. type(state): {type(state)}")
@@ -93,17 +108,16 @@ class PyExecutorAgent:
     def review_code(self, state: GraphState) -> GraphState:
         self.log.info("\n++++++++++++ executing review_code")
         self.log_state(state)
-        parser = PydanticOutputParser(pydantic_object=ReviewState)
-        output_formatting = parser.get_format_instructions()
-        state["messages"].append(("user", get_review_prompt(state, output_formatting)))
+        view = self._view(state, "messages", "generation", "spec")
+        view["messages"].append(("user", get_review_prompt(view, self.review_formatting)))
         
         result = None
         tries = 0
         while not result and tries < self.try_tolerance:
             try:
                 #TODO: Should we verify that result.code_review exists after?
-                self.log.info(f"Reviewing code and tests with messages: {state["messages"]}")
-                result = self.llm.with_structured_output(ReviewState).invoke(state['messages'])
+                self.log.info(f"Reviewing code and tests with messages: {view["messages"]}")
+                result = self.review_llm.invoke(view['messages'])
             except Exception as e:
                 self.log.error(f"Error getting code review: {e}. Retrying...")
                 result = None
@@ -114,28 +128,27 @@ class PyExecutorAgent:
             self.py_executor.stop_and_remove()
             exit(1)
 
-        with open(f"{self.storage_dir}/review_{self.review_count}.txt", "w+") as review_f:
-            review_f.write(f'{result.code_review}\n\npassed: {result.passing_review}')
-            self.review_count += 1
+        self.artifact_store.record(self.run_id, "review", self.review_count,
+                                   f'{result.code_review}\n\npassed: {result.passing_review}')
+        self.review_count += 1
 
-        return {**state,
-                "messages": state["messages"][0:1],
-                "code_review": result}
+        return self._pack({**state,
+                           "messages": state["messages"][0:1],
+                           "code_review": result})
 
     def fix_with_review(self, state: GraphState) -> GraphState:
         self.log.info("\n++++++++++++ executing fix_with_review")
         self.log_state(state)
-        parser = PydanticOutputParser(pydantic_object=CodeState)
-        output_formatting = parser.get_format_instructions()
-        state["messages"].append(("user", get_fix_with_review_prompt(state, output_formatting)))
+        view = self._view(state, "messages", "generation", "spec", "code_review")
+        view["messages"].append(("user", get_fix_with_review_prompt(view, self.output_formatting)))
 
         
         result = None
         retries = 0
         while not result and retries < self.try_tolerance:
             try:
-                self.log.info(f"fixing with review with messages: {state["messages"]}")
-                result = self.llm.with_structured_output(CodeState).invoke(state['messages'])
+                self.log.info(f"fixing with review with messages: {view["messages"]}")
+                result = self.code_llm.invoke(view['messages'])
             except Exception as e:
                 self.log.error(f"Exception caught while generating code in fix with review. ")
                 retries += 1
@@ -146,12 +159,11 @@ class PyExecutorAgent:
                 self.py_executor.stop_and_remove()
             exit(1)
 
-        return {**state,
-                "messages": state["messages"][0:1],
-                "error": "",
-                # "code_review": None, # Might not need this anymore as there is now a pass/fail variable
-                "messages": state['messages'],
-                "generation": result}
+        return self._pack({**state,
+                           "messages": state["messages"][0:1],
+                           "error": "",
+                           # "code_review": None, # Might not need this anymore as there is now a pass/fail variable
+                           "generation": result})
 
     def handle_code_review(self, state: GraphState) -> str:
         self.log.info("\n+++++++++++++++ executing handle_code_review")
@@ -164,14 +176,15 @@ class PyExecutorAgent:
         self.log.info("\n++++++++++++ executing fix_code")
         self.log_state(state)
         # print(f"======== state['error']: {state['error']}, messages: {state['messages']}")
-        state['messages'].append(("user", get_fix_prompt(state, self.output_formatting)))
+        view = self._view(state, "messages", "generation")
+        view['messages'].append(("user", get_fix_prompt(view, self.output_formatting)))
         
         generation = None
         tries = 0
         while not generation and tries < self.try_tolerance:
             try:
-                self.log.info(f"Fixing with messages: {state["messages"]}")
-                generation = self.llm.with_structured_output(CodeState).invoke(state['messages'])
+                self.log.info(f"Fixing with messages: {view["messages"]}")
+                generation = self.code_llm.invoke(view['messages'])
             except ValidationError as e:
                 tries += 1
                 self.log.error(f"Validation error while parsing llm output: {e}.\nRetrying...")
@@ -181,11 +194,11 @@ class PyExecutorAgent:
             self.py_executor.stop_and_remove()
             exit(1)
 
-        return {**state,
-                "error": "",
-                "messages": state['messages'][0:1],
-                "generation": generation,
-                "iterations": state["iterations"] + 1}
+        return self._pack({**state,
+                           "error": "",
+                           "messages": state['messages'][0:1],
+                           "generation": generation,
+                           "iterations": state["iterations"] + 1})
     
     def fail(self, state: GraphState):
         self.log.info("\n+++++++++++++ executing fail")
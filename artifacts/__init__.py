@@ -0,0 +1,305 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zstandard
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Union
+from models.artifactref import ArtifactRef
+from models.codestate import CodeState, CodeStateRef
+from models.reviewstate import ReviewState, ReviewStateRef
+
+
+class ArtifactStore(ABC):
+    """Base for content-addressed stores of the large text payloads carried through the graph.
+
+    Compacted graph states only carry ArtifactRefs; subclasses decide where the payloads live.
+    Nothing is held in memory here, so a compact state costs only its refs for as long as
+    LangGraph keeps it.
+    """
+    def __init__(self):
+        self.log = logging.getLogger("ArtifactStore")
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def put(self, text: str) -> ArtifactRef:
+        """Store a payload and return a reference to it."""
+
+    @abstractmethod
+    def get(self, ref: ArtifactRef) -> str:
+        """Return the payload a reference points to."""
+
+    def _unpack_text(self, value: Union[str, ArtifactRef]) -> Union[str, ArtifactRef]:
+        return self.get(value) if isinstance(value, ArtifactRef) else value
+
+    def compact(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a copy of the state with the spec, generation and review as refs.
+
+        Messages are left as they are: prompts are transient and are dropped from the state
+        after each LLM call, so storing them would only accumulate payloads nothing reads again.
+        """
+        compacted = dict(state)
+        if isinstance(compacted.get("spec"), str):
+            compacted["spec"] = self.put(compacted["spec"])
+        generation = compacted.get("generation")
+        if isinstance(generation, CodeState):
+            compacted["generation"] = CodeStateRef(
+                test_suite=self.put(generation.test_suite),
+                code_under_test=self.put(generation.code_under_test),
+                code_module_name=generation.code_module_name,
+                code_under_test_name=generation.code_under_test_name,
+                filename_extension=generation.filename_extension)
+        review = compacted.get("code_review")
+        if isinstance(review, ReviewState):
+            compacted["code_review"] = ReviewStateRef(code_review=self.put(review.code_review),
+                                                      passing_review=review.passing_review)
+        return compacted
+
+    def materialize(self, state: Dict[str, Any], *keys: str) -> Dict[str, Any]:
+        """Return a copy of the state with only the requested keys resolved back to full payloads."""
+        materialized = dict(state)
+        for key in keys:
+            value = materialized.get(key)
+            if key == "spec":
+                materialized[key] = self._unpack_text(value)
+            elif key == "generation" and isinstance(value, CodeStateRef):
+                materialized[key] = CodeState(
+                    test_suite=self.get(value.test_suite),
+                    code_under_test=self.get(value.code_under_test),
+                    code_module_name=value.code_module_name,
+                    code_under_test_name=value.code_under_test_name,
+                    filename_extension=value.filename_extension)
+            elif key == "code_review" and isinstance(value, ReviewStateRef):
+                materialized[key] = ReviewState(code_review=self.get(value.code_review),
+                                                passing_review=value.passing_review)
+            elif key == "messages":
+                # Messages are never compacted; copy the list so nodes can append prompts
+                # without mutating the stored state.
+                materialized[key] = list(value)
+        return materialized
+
+
+class DiskArtifactStore(ArtifactStore):
+    """ArtifactStore persisted under a storage directory, with an index of runs and their artifacts.
+
+    Payloads are deduplicated by sha256 and written once, zstd-compressed, to
+    objects/<digest[:2]>/<digest>.zst. An sqlite index records each run (spec, language,
+    model, outcome), the code, tests and reviews produced at every iteration and whether that
+    iteration's tests passed, so runs can be queried without scanning the object tree. gc() applies the retention policy.
+    """
+    def __init__(self, root="storage", compression_level=10, touch_interval=60 * 60):
+        super().__init__()
+        self.log = logging.getLogger("DiskArtifactStore")
+        self.root = root
+        # A digest's last_used is refreshed in the index at most once per touch_interval, so
+        # repeated puts of the same payload (spec, unchanged code) never hit the database.
+        self.touch_interval = touch_interval
+        self._touched: Dict[str, float] = {}
+        self.objects_dir = os.path.join(root, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._compressor = zstandard.ZstdCompressor(level=compression_level)
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite3"), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._lock:
+            self._db.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS blobs (
+                    digest TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    stored_size INTEGER NOT NULL,
+                    last_used REAL NOT NULL);
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT PRIMARY KEY,
+                    spec_digest TEXT,
+                    language TEXT,
+                    model TEXT,
+                    started_at REAL NOT NULL,
+                    finished_at REAL,
+                    outcome TEXT NOT NULL DEFAULT 'running');
+                CREATE TABLE IF NOT EXISTS artifacts (
+                    run_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    iteration INTEGER NOT NULL,
+                    digest TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (run_id, kind, iteration));
+                CREATE TABLE IF NOT EXISTS results (
+                    run_id TEXT NOT NULL,
+                    iteration INTEGER NOT NULL,
+                    passed INTEGER NOT NULL,
+                    digest TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (run_id, iteration));
+                CREATE INDEX IF NOT EXISTS runs_spec ON runs (spec_digest);
+                CREATE INDEX IF NOT EXISTS runs_outcome ON runs (outcome, started_at);
+                CREATE INDEX IF NOT EXISTS artifacts_digest ON artifacts (digest);
+                CREATE INDEX IF NOT EXISTS results_digest ON results (digest);
+            """)
+
+    def __del__(self):
+        if getattr(self, "_db", None):
+            self._db.close()
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.zst")
+
+    def put(self, text: str) -> ArtifactRef:
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        object_path = self._object_path(digest)
+        ref = ArtifactRef(digest=digest, size=len(data))
+        now = time.time()
+        with self._lock:
+            # The object is checked too: gc on another store instance may have removed it.
+            if now - self._touched.get(digest, 0) < self.touch_interval and os.path.exists(object_path):
+                return ref
+            known = self._db.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            if known and os.path.exists(object_path):
+                self._db.execute("UPDATE blobs SET last_used = ? WHERE digest = ?", (now, digest))
+            else:
+                compressed = self._compressor.compress(data)
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                tmp_path = f"{object_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as object_f:
+                    object_f.write(compressed)
+                os.replace(tmp_path, object_path)
+                self._db.execute("INSERT OR REPLACE INTO blobs (digest, size, stored_size, last_used) VALUES (?, ?, ?, ?)",
+                                 (digest, len(data), len(compressed), now))
+            self._db.commit()
+            self._touched[digest] = now
+        return ref
+
+    def get(self, ref: ArtifactRef) -> str:
+        with open(self._object_path(ref.digest), 'rb') as object_f:
+            # Decompressors are not safe to share between threads, so use one per read.
+            return zstandard.ZstdDecompressor().decompress(object_f.read()).decode('utf-8')
+
+    def start_run(self, spec: Optional[str] = None, language: Optional[str] = None, model: Optional[str] = None) -> str:
+        """Register a new run in the index and return its id."""
+        run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        spec_digest = self.put(spec).digest if spec is not None else None
+        with self._lock:
+            self._db.execute("INSERT INTO runs (run_id, spec_digest, language, model, started_at) VALUES (?, ?, ?, ?, ?)",
+                             (run_id, spec_digest, language, model, time.time()))
+            self._db.commit()
+        self.log.info(f"Started run: {run_id}")
+        return run_id
+
+    def record(self, run_id: str, kind: str, iteration: int, text: str) -> ArtifactRef:
+        """Store an artifact (e.g. "code", "tests", "review") produced by a run at the given iteration."""
+        ref = self.put(text)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO artifacts (run_id, kind, iteration, digest, created_at) VALUES (?, ?, ?, ?, ?)",
+                             (run_id, kind, iteration, ref.digest, time.time()))
+            self._db.commit()
+        return ref
+
+    def record_result(self, run_id: str, iteration: int, passed: bool, output: str) -> ArtifactRef:
+        """Store the test output for an iteration of a run along with whether its tests passed."""
+        ref = self.put(output)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO results (run_id, iteration, passed, digest, created_at) VALUES (?, ?, ?, ?, ?)",
+                             (run_id, iteration, int(passed), ref.digest, time.time()))
+            self._db.commit()
+        return ref
+
+    def finish_run(self, run_id: str, outcome: str):
+        with self._lock:
+            self._db.execute("UPDATE runs SET outcome = ?, finished_at = ? WHERE run_id = ?",
+                             (outcome, time.time(), run_id))
+            self._db.commit()
+        self.log.info(f"Finished run: {run_id}, outcome: {outcome}")
+
+    def find_runs(self, spec: Optional[str] = None, outcome: Optional[str] = None,
+                  since: Optional[datetime] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Return the most recent runs matching the given spec text, outcome and start time."""
+        clauses = []
+        params = []
+        if spec is not None:
+            clauses.append("spec_digest = ?")
+            params.append(hashlib.sha256(spec.encode('utf-8')).hexdigest())
+        if outcome is not None:
+            clauses.append("outcome = ?")
+            params.append(outcome)
+        if since is not None:
+            clauses.append("started_at >= ?")
+            params.append(since.timestamp())
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._db.execute(f"SELECT * FROM runs {where} ORDER BY started_at DESC LIMIT ?",
+                                    (*params, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def run_artifacts(self, run_id: str, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return the artifacts recorded for a run, ordered by kind and iteration."""
+        query = "SELECT a.kind, a.iteration, a.digest, a.created_at, b.size, b.stored_size " \
+                "FROM artifacts a JOIN blobs b ON a.digest = b.digest WHERE a.run_id = ?"
+        params = [run_id]
+        if kind is not None:
+            query += " AND a.kind = ?"
+            params.append(kind)
+        with self._lock:
+            rows = self._db.execute(f"{query} ORDER BY a.kind, a.iteration", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def run_results(self, run_id: str, passed: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """Return the test results recorded for a run, optionally only passing or failing ones."""
+        query = "SELECT iteration, passed, digest, created_at FROM results WHERE run_id = ?"
+        params = [run_id]
+        if passed is not None:
+            query += " AND passed = ?"
+            params.append(int(passed))
+        with self._lock:
+            rows = self._db.execute(f"{query} ORDER BY iteration", params).fetchall()
+        return [{**dict(row), "passed": bool(row["passed"])} for row in rows]
+
+    def gc(self, max_age_days: Optional[float] = None, max_runs: Optional[int] = None,
+           grace_seconds: float = 24 * 60 * 60) -> Dict[str, int]:
+        """Apply the retention policy and delete objects no longer referenced.
+
+        Runs started more than max_age_days ago (including ones left 'running' by a process that
+        died), and finished runs beyond the max_runs most recent, are dropped from the index.
+        Objects not referenced by any remaining run and unused for grace_seconds (compact graph
+        states reference objects that are never recorded against a run) are deleted. last_used is
+        only refreshed once per touch_interval, so keep grace_seconds longer than that; put()
+        rewrites an object it finds missing.
+        """
+        now = time.time()
+        with self._lock:
+            expired = set()
+            if max_age_days is not None:
+                cutoff = now - max_age_days * 24 * 60 * 60
+                expired.update(row["run_id"] for row in self._db.execute(
+                    "SELECT run_id FROM runs WHERE started_at < ?", (cutoff,)))
+            if max_runs is not None:
+                expired.update(row["run_id"] for row in self._db.execute(
+                    "SELECT run_id FROM runs WHERE outcome != 'running' ORDER BY started_at DESC LIMIT -1 OFFSET ?",
+                    (max_runs,)))
+            for run_id in expired:
+                self._db.execute("DELETE FROM artifacts WHERE run_id = ?", (run_id,))
+                self._db.execute("DELETE FROM results WHERE run_id = ?", (run_id,))
+                self._db.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+            unreferenced = [row["digest"] for row in self._db.execute("""
+                SELECT digest FROM blobs WHERE last_used < ?
+                AND digest NOT IN (SELECT digest FROM artifacts)
+                AND digest NOT IN (SELECT digest FROM results)
+                AND digest NOT IN (SELECT spec_digest FROM runs WHERE spec_digest IS NOT NULL)""",
+                (now - grace_seconds,))]
+            freed = 0
+            for digest in unreferenced:
+                object_path = self._object_path(digest)
+                if os.path.exists(object_path):
+                    freed += os.path.getsize(object_path)
+                    os.remove(object_path)
+                self._db.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                self._touched.pop(digest, None)
+            self._db.commit()
+
+        stats = {"runs_removed": len(expired), "objects_removed": len(unreferenced), "bytes_freed": freed}
+        self.log.info(f"Artifact store gc complete: {stats}")
+        return stats
@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.chat_models import init_chat_model
+from langchain.output_parsers import PydanticOutputParser
+from llms import get_llm_registry
+from models.codestate import CodeState
+from models.reviewstate import ReviewState
+
+
+def time_per_call(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def run(model, model_provider, iterations):
+    """Compare per node-call setup cost (no LLM request is sent) with and without the registry."""
+    llm = init_chat_model(model, max_tokens=8192, temperature=0.6, model_provider=model_provider)
+    registry = get_llm_registry()
+
+    def uncached_structured():
+        llm.with_structured_output(CodeState)
+        llm.with_structured_output(ReviewState)
+
+    def cached_structured():
+        registry.get_structured(model, model_provider, CodeState)
+        registry.get_structured(model, model_provider, ReviewState)
+
+    def uncached_formatting():
+        PydanticOutputParser(pydantic_object=CodeState).get_format_instructions()
+        PydanticOutputParser(pydantic_object=ReviewState).get_format_instructions()
+
+    def cached_formatting():
+        registry.get_format_instructions(CodeState)
+        registry.get_format_instructions(ReviewState)
+
+    def uncached_model():
+        init_chat_model(model, max_tokens=8192, temperature=0.6, model_provider=model_provider)
+
+    def cached_model():
+        registry.get_model(model, model_provider)
+
+    for name, fn in [("structured output (per call)", uncached_structured),
+                     ("structured output (registry)", cached_structured),
+                     ("format instructions (per call)", uncached_formatting),
+                     ("format instructions (registry)", cached_formatting),
+                     ("chat model (per agent)", uncached_model),
+                     ("chat model (registry)", cached_model)]:
+        print(f"{name:<32} {time_per_call(fn, iterations):>10.1f} us/call")
+
+
+if __name__ == '__main__':
+    load_dotenv()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', type=str, default=os.getenv('MODEL', 'claude-3-5-sonnet-latest'))
+    parser.add_argument('--provider', type=str, default=os.getenv('PROVIDER', 'anthropic'))
+    parser.add_argument('-n', '--iterations', type=int, default=1000)
+    args = parser.parse_args()
+    # Building clients does not contact the provider, so a placeholder key is enough.
+    os.environ.setdefault('ANTHROPIC_API_KEY', 'benchmark')
+    run(args.model, args.provider, args.iterations)
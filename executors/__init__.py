@@ -8,19 +8,21 @@ import tempfile
 import shutil
 from typing import Dict, Any
 from models.graphstate import GraphState
-from datetime import datetime
+from artifacts import DiskArtifactStore
 
 
 class PyDockerExecutor:
-    def __init__(self, storage_dir):
+    def __init__(self, artifact_store: DiskArtifactStore, run_id: str):
         self.log = logging.getLogger("PyDockerExecutor")
         self.container_name = "pyexecutor"
         self.docker_client = docker.client.from_env()
         self.container = None
         self.temp_dir = None
         self.iteration = 0
-        self.file_storage_dir = storage_dir
-        os.makedirs(self.file_storage_dir, exist_ok=True)
+        # The iteration whose code and tests are currently in temp_dir, until its result is recorded.
+        self.last_built_iteration = None
+        self.artifact_store = artifact_store
+        self.run_id = run_id
 
     def __del__(self):
         """Clean up resources when the object is destroyed."""
@@ -111,16 +113,15 @@ class PyDockerExecutor:
                 test_f.write(generation.test_suite)
             self.log.info(f"Wrote to file: {tests_dest}, tests: {generation.test_suite}")
 
-            with open(f"{self.file_storage_dir}/tests_{self.iteration}.py", 'w+') as store_f:
-                store_f.write(generation.test_suite)
+            self.artifact_store.record(self.run_id, "tests", self.iteration, generation.test_suite)
 
             code_dest = os.path.join(self.temp_dir, generation.code_module_name + ".py")
             with open(code_dest, 'w+') as code_f:
                 code_f.write(generation.code_under_test)
             self.log.info(f"Wrote to file: {code_dest}, code: {generation.code_under_test}")
 
-            with open(f"{self.file_storage_dir}/code_{self.iteration}.py", 'w+') as store_f:
-                store_f.write(generation.code_under_test)
+            self.artifact_store.record(self.run_id, "code", self.iteration, generation.code_under_test)
+            self.last_built_iteration = self.iteration
             self.iteration += 1
         else:
             self.log.warning("Temp dir does not exist. Cannot write files.")
@@ -140,6 +141,11 @@ class PyDockerExecutor:
             workdir="/app"
         )
         
+        # Only index the outcome when it belongs to code and tests that were actually built.
+        if self.last_built_iteration is not None:
+            self.artifact_store.record_result(self.run_id, self.last_built_iteration, exit_code == 0, output.decode())
+            self.last_built_iteration = None
+
         if exit_code != 0:
             return {'error': output.decode()}
         else:
@@ -158,7 +164,8 @@ class PyDockerExecutor:
 if __name__ == '__main__':
     logging.basicConfig(stream=sys.stdout, level=logging.DEBUG)
     load_dotenv()
-    py_docker_executor = PyDockerExecutor()
+    artifact_store = DiskArtifactStore()
+    py_docker_executor = PyDockerExecutor(artifact_store, artifact_store.start_run())
     try:
         script = """
 print('hello docker')
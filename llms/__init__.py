@@ -0,0 +1,80 @@
+import logging
+import threading
+from typing import Dict, Tuple, Type, Any
+import httpx
+from pydantic import BaseModel
+from langchain.chat_models import init_chat_model
+from langchain.output_parsers import PydanticOutputParser
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable
+
+
+class LLMClientRegistry:
+    """Process wide cache of chat models, structured-output runnables and format instructions.
+
+    Agents running in the same process share one chat model (and with it one pooled,
+    keep-alive HTTP client) per model/provider/settings, and one structured-output
+    runnable per (model, schema), instead of rebuilding them on every node call.
+    """
+    def __init__(self, max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0):
+        self.log = logging.getLogger("LLMClientRegistry")
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive_connections,
+                                   keepalive_expiry=keepalive_expiry)
+        self._lock = threading.Lock()
+        self._models: Dict[Tuple, BaseChatModel] = {}
+        self._structured: Dict[Tuple, Runnable] = {}
+        self._format_instructions: Dict[Type[BaseModel], str] = {}
+
+    def _client_kwargs(self, model_provider) -> Dict[str, Any]:
+        """Connection pool settings for the provider's underlying HTTP client."""
+        if model_provider == "ollama":
+            # ChatOllama hands client_kwargs straight to the httpx.Client it creates.
+            return {"client_kwargs": {"limits": self.limits}}
+        # The anthropic SDK client already pools and keeps connections alive; sharing the
+        # model instance is what shares the pool.
+        return {}
+
+    def get_model(self, model, model_provider, max_tokens=8192, temperature=0.6) -> BaseChatModel:
+        key = (model, model_provider, max_tokens, temperature)
+        with self._lock:
+            llm = self._models.get(key)
+            if llm is None:
+                self.log.debug(f"Creating chat model for key: {key}")
+                llm = init_chat_model(model, max_tokens=max_tokens, temperature=temperature,
+                                      model_provider=model_provider, **self._client_kwargs(model_provider))
+                self._models[key] = llm
+            return llm
+
+    def get_structured(self, model, model_provider, schema: Type[BaseModel],
+                       max_tokens=8192, temperature=0.6) -> Runnable:
+        key = (model, model_provider, max_tokens, temperature, schema)
+        llm = self.get_model(model, model_provider, max_tokens, temperature)
+        with self._lock:
+            runnable = self._structured.get(key)
+            if runnable is None:
+                self.log.debug(f"Binding structured output {schema.__name__} for model: {model}")
+                runnable = llm.with_structured_output(schema)
+                self._structured[key] = runnable
+            return runnable
+
+    def get_format_instructions(self, schema: Type[BaseModel]) -> str:
+        with self._lock:
+            instructions = self._format_instructions.get(schema)
+            if instructions is None:
+                instructions = PydanticOutputParser(pydantic_object=schema).get_format_instructions()
+                self._format_instructions[schema] = instructions
+            return instructions
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_llm_registry() -> LLMClientRegistry:
+    """Return the process wide LLMClientRegistry, creating it on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = LLMClientRegistry()
+        return _registry
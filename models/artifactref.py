@@ -0,0 +1,10 @@
+from pydantic import BaseModel, Field
+
+class ArtifactRef(BaseModel):
+    """Reference to a text payload held in an ArtifactStore."""
+    digest: str = Field(description="The sha256 hex digest of the payload.")
+    size: int = Field(description="The size of the payload in bytes.")
+
+    def __bool__(self):
+        # Mirror the truthiness of the payload so empty-content checks work on references.
+        return self.size > 0
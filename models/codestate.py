@@ -1,4 +1,5 @@
 from pydantic import BaseModel, Field
+from models.artifactref import ArtifactRef
 
 class CodeState(BaseModel):
     """Model for a test suite of unit tests and code under test generated from Given-When-Then specs."""
@@ -6,4 +7,12 @@ class CodeState(BaseModel):
     code_under_test: str = Field(description="The code that the test suite is testing.")
     code_module_name: str = Field(description="The import file name for the class identifier of the code that is being tested.")
     code_under_test_name: str = Field(description="The class identifier of the code that is being tested.")
-    filename_extension: str = Field(descripiton="The file extension based off of the language type.")
\ No newline at end of file
+    filename_extension: str = Field(descripiton="The file extension based off of the language type.")
+
+class CodeStateRef(BaseModel):
+    """Compact form of CodeState with the test suite and code held in an ArtifactStore."""
+    test_suite: ArtifactRef
+    code_under_test: ArtifactRef
+    code_module_name: str
+    code_under_test_name: str
+    filename_extension: str
@@ -1,12 +1,13 @@
-from typing import TypedDict, List, Optional
-from models.codestate import CodeState
-from models.reviewstate import ReviewState
+from typing import TypedDict, List, Optional, Tuple, Union
+from models.artifactref import ArtifactRef
+from models.codestate import CodeState, CodeStateRef
+from models.reviewstate import ReviewState, ReviewStateRef
 
 class GraphState(TypedDict):
     error: str
-    messages: List[str]
-    generation: CodeState
+    messages: List[Tuple[str, str]]
+    generation: Union[CodeState, CodeStateRef]
     iterations: int
     success: bool
-    code_review: Optional[ReviewState] = None
-    spec: str
\ No newline at end of file
+    code_review: Optional[Union[ReviewState, ReviewStateRef]] = None
+    spec: Union[str, ArtifactRef]
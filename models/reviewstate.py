@@ -1,7 +1,13 @@
 from pydantic import BaseModel, Field
+from models.artifactref import ArtifactRef
 from typing import Optional
 
 class ReviewState(BaseModel):
     """Model for a review of code and tests generated from a Given-When-Then specs."""
     code_review: str = Field(description="The review of the code and tests generated from a Given-When-Then specs.")
-    passing_review: bool = Field(description="True if no further iteration on the code and tests are needed. False if there is more work needed on the code and tests.")
\ No newline at end of file
+    passing_review: bool = Field(description="True if no further iteration on the code and tests are needed. False if there is more work needed on the code and tests.")
+
+class ReviewStateRef(BaseModel):
+    """Compact form of ReviewState with the review text held in an ArtifactStore."""
+    code_review: ArtifactRef
+    passing_review: bool
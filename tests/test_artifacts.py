@@ -0,0 +1,114 @@
+import os
+import pytest
+from artifacts import DiskArtifactStore
+from models.codestate import CodeState, CodeStateRef
+from models.reviewstate import ReviewState, ReviewStateRef
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DiskArtifactStore(str(tmp_path))
+
+
+def object_files(store):
+    return [name for _, _, names in os.walk(store.objects_dir) for name in names]
+
+
+def test_identical_puts_dedup_to_one_object(store):
+    first = store.put("def f():\n    return 1\n")
+    second = store.put("def f():\n    return 1\n")
+
+    assert first == second
+    assert object_files(store) == [f"{first.digest}.zst"]
+    assert store._db.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 1
+    assert store.get(first) == "def f():\n    return 1\n"
+
+
+def test_empty_payload_ref_is_falsy(store):
+    assert not store.put("")
+    assert store.put("x")
+
+
+def test_compact_materialize_round_trip(store):
+    state = {"messages": [("system", "prompt")],
+             "spec": "Given a spec",
+             "generation": CodeState(test_suite="tests", code_under_test="code", code_module_name="module",
+                                     code_under_test_name="Name", filename_extension=".py"),
+             "code_review": ReviewState(code_review="looks good", passing_review=True),
+             "error": "",
+             "iterations": 2,
+             "success": True}
+
+    compacted = store.compact(state)
+    assert isinstance(compacted["generation"], CodeStateRef)
+    assert isinstance(compacted["code_review"], ReviewStateRef)
+    assert compacted["messages"] == state["messages"]
+
+    materialized = store.materialize(compacted, "messages", "spec", "generation", "code_review")
+    assert materialized == state
+    assert materialized["messages"] is not compacted["messages"]
+
+
+def test_put_rewrites_object_removed_by_another_instance(store):
+    other = DiskArtifactStore(store.root)
+    store.put("payload")
+    other.gc(grace_seconds=0)
+
+    ref = store.put("payload")
+    assert store.get(ref) == "payload"
+
+
+def test_gc_max_runs_keeps_running_runs(store):
+    running = store.start_run("spec")
+    finished = store.start_run("spec")
+    store.finish_run(finished, "passed")
+
+    stats = store.gc(max_runs=0, grace_seconds=0)
+
+    assert stats["runs_removed"] == 1
+    assert [run["run_id"] for run in store.find_runs()] == [running]
+
+
+def test_gc_max_age_expires_running_runs(store):
+    store.start_run("spec")
+
+    stats = store.gc(max_age_days=0, grace_seconds=0)
+
+    assert stats["runs_removed"] == 1
+    assert store.find_runs() == []
+    assert object_files(store) == []
+
+
+def test_gc_keeps_referenced_objects(store):
+    run_id = store.start_run("the spec")
+    code = store.record(run_id, "code", 0, "the code")
+    store.record_result(run_id, 0, False, "the output")
+    unreferenced = store.put("only in graph state")
+
+    stats = store.gc(grace_seconds=0)
+
+    assert stats["objects_removed"] == 1
+    assert not os.path.exists(store._object_path(unreferenced.digest))
+    assert store.get(code) == "the code"
+    assert store.find_runs(spec="the spec")[0]["run_id"] == run_id
+    output = store.run_results(run_id)[0]["digest"]
+    assert os.path.exists(store._object_path(output))
+    assert os.path.exists(store._object_path(store.find_runs()[0]["spec_digest"]))
+
+
+def test_gc_grace_period_keeps_recent_unreferenced_objects(store):
+    ref = store.put("only in graph state")
+
+    assert store.gc()["objects_removed"] == 0
+    assert store.get(ref) == "only in graph state"
+
+
+def test_run_results_filters_by_outcome(store):
+    run_id = store.start_run("spec")
+    store.record_result(run_id, 0, False, "Traceback")
+    store.record_result(run_id, 1, True, "OK")
+
+    assert [result["iteration"] for result in store.run_results(run_id)] == [0, 1]
+    failed = store.run_results(run_id, passed=False)
+    assert [(result["iteration"], result["passed"]) for result in failed] == [(0, False)]
+    assert [result["iteration"] for result in store.run_results(run_id, passed=True)] == [1]